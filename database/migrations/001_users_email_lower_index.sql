@@ -0,0 +1,2 @@
+-- Expression index backing case-insensitive email lookups in the auth service
+CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users(lower(email));
@@ -0,0 +1,3 @@
+-- Compound index serving filtered, newest-first file listings and their counts
+CREATE INDEX IF NOT EXISTS idx_files_owner_project_type_created
+    ON files(owner_id, project_id, file_type, created_at DESC);
@@ -164,6 +164,7 @@ CREATE TABLE audit_logs (
 
 -- Create indexes for better performance
 CREATE INDEX idx_users_email ON users(email);
+CREATE INDEX idx_users_email_lower ON users(lower(email));
 CREATE INDEX idx_users_username ON users(username);
 CREATE INDEX idx_users_role ON users(role);
 
@@ -175,6 +176,7 @@ CREATE INDEX idx_files_project_id ON files(project_id);
 CREATE INDEX idx_files_owner_id ON files(owner_id);
 CREATE INDEX idx_files_file_type ON files(file_type);
 CREATE INDEX idx_files_created_at ON files(created_at);
+CREATE INDEX idx_files_owner_project_type_created ON files(owner_id, project_id, file_type, created_at DESC);
 CREATE INDEX idx_files_gps_coordinates ON files USING GIST(gps_coordinates);
 
 CREATE INDEX idx_processing_tasks_project_id ON processing_tasks(project_id);
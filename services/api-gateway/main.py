@@ -1,13 +1,18 @@
+import asyncio
 import os
 import sys
+import time
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import httpx
-from fastapi import FastAPI, Request, HTTPException, Depends
+import orjson
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+from fastapi import FastAPI, Request, Response, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import structlog
 
 # Add shared modules to path
@@ -30,8 +35,16 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     logger.info("Starting API Gateway")
     
-    # Initialize HTTP client
-    app.state.http_client = httpx.AsyncClient(timeout=30.0)
+    # Initialize shared HTTP client (owned by the lifespan, never closed per request)
+    app.state.http_client = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(
+            max_keepalive_connections=100,
+            max_connections=500,
+            keepalive_expiry=30.0
+        ),
+        http2=True
+    )
     
     yield
     
@@ -45,7 +58,8 @@ app = FastAPI(
     title="Teledetection Drone Satellite Platform",
     description="API Gateway for drone and satellite image processing platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add middleware
@@ -62,8 +76,9 @@ app.add_middleware(
     allowed_hosts=settings.allowed_hosts
 )
 
-app.add_middleware(LoggingMiddleware)
-app.add_middleware(MetricsMiddleware)
+app.add_middleware(LoggingMiddleware, sample_rate=settings.log_sample_rate)
+if settings.enable_metrics:
+    app.add_middleware(MetricsMiddleware)
 app.add_middleware(AuthMiddleware)
 
 
@@ -78,12 +93,32 @@ SERVICE_ROUTES = {
     "/api/v1/visualization": settings.visualization_service_url,
 }
 
+# Service lookup keyed on the first path segment after /api/v1/
+SERVICE_SEGMENTS = {
+    route_prefix.rsplit("/", 1)[1]: service_url
+    for route_prefix, service_url in SERVICE_ROUTES.items()
+}
+
+
+# Hop-by-hop headers that must not be forwarded between client and upstream
+HOP_BY_HOP_HEADERS = frozenset((
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "content-length",
+))
+
 
 async def proxy_request(
     request: Request,
     target_url: str,
     path: str
-) -> JSONResponse:
+) -> StreamingResponse:
     """Proxy request to target service"""
     try:
         # Prepare request data
@@ -93,26 +128,39 @@ async def proxy_request(
         # Remove host header to avoid conflicts
         headers.pop("host", None)
         
-        # Get request body if present
+        # Stream the request body chunk by chunk instead of buffering uploads;
+        # httpx re-frames it, so only the length is forwarded
         body = None
-        if method in ["POST", "PUT", "PATCH"]:
-            body = await request.body()
+        if "content-length" in headers or "transfer-encoding" in headers:
+            body = request.stream()
+        
+        for name in HOP_BY_HOP_HEADERS - {"content-length"}:
+            headers.pop(name, None)
         
-        # Make request to target service
-        async with app.state.http_client as client:
-            response = await client.request(
-                method=method,
-                url=f"{target_url}{path}",
-                headers=headers,
-                content=body,
-                params=request.query_params
-            )
+        # Make request to target service, leaving the response body unread
+        upstream_request = app.state.http_client.build_request(
+            method=method,
+            url=f"{target_url}{path}",
+            headers=headers,
+            content=body,
+            params=request.query_params
+        )
+        response = await app.state.http_client.send(upstream_request, stream=True)
+        
+        response_headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+        }
         
-        # Return response
-        return JSONResponse(
-            content=response.json() if response.content else {},
+        # Pipe the upstream bytes through untouched; the connection is
+        # released back to the pool once the body has been sent
+        return StreamingResponse(
+            response.aiter_raw(),
             status_code=response.status_code,
-            headers=dict(response.headers)
+            headers=response_headers,
+            media_type=response.headers.get("content-type"),
+            background=BackgroundTask(response.aclose)
         )
     
     except httpx.TimeoutException:
@@ -128,62 +176,105 @@ async def proxy_request(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Static root body, serialized once at import
+ROOT_BODY = orjson.dumps({
+    "message": "Teledetection Drone Satellite Platform API Gateway",
+    "version": "1.0.0",
+    "status": "healthy"
+})
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "message": "Teledetection Drone Satellite Platform API Gateway",
-        "version": "1.0.0",
-        "status": "healthy"
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(force: bool = False):
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": "2024-01-01T00:00:00Z",
-        "services": await check_services_health()
-    }
+    # The body is re-serialized only when the services health is refreshed
+    await check_services_health(force=force)
+    return Response(content=_health_cache["body"], media_type="application/json")
+
 
+# Cached aggregate of downstream health, shared by all concurrent probes
+_health_cache: Dict[str, Any] = {"ts": 0.0, "value": None, "body": b""}
+_health_lock = asyncio.Lock()
 
-async def check_services_health() -> Dict[str, str]:
+
+def _cached_services_health() -> Optional[Dict[str, str]]:
+    """Return the cached services health if it is still fresh"""
+    if time.monotonic() - _health_cache["ts"] < settings.health_cache_ttl:
+        return _health_cache["value"]
+    return None
+
+
+async def check_services_health(force: bool = False) -> Dict[str, str]:
     """Check health of all services"""
-    services_health = {}
+    if not force:
+        cached = _cached_services_health()
+        if cached is not None:
+            return cached
     
-    for route, service_url in SERVICE_ROUTES.items():
-        try:
-            async with app.state.http_client as client:
-                response = await client.get(
-                    f"{service_url}/health",
-                    timeout=5.0
-                )
-                services_health[route] = "healthy" if response.status_code == 200 else "unhealthy"
-        except Exception:
-            services_health[route] = "unhealthy"
+    async with _health_lock:
+        # Another probe may have refreshed the cache while we were waiting
+        if not force:
+            cached = _cached_services_health()
+            if cached is not None:
+                return cached
+        
+        # Probe every service concurrently so latency is bounded by the slowest one
+        probes = [
+            app.state.http_client.get(f"{service_url}/health", timeout=5.0)
+            for service_url in SERVICE_ROUTES.values()
+        ]
+        results = await asyncio.gather(*probes, return_exceptions=True)
+        
+        services_health = {}
+        for route, result in zip(SERVICE_ROUTES, results):
+            if isinstance(result, Exception) or result.status_code != 200:
+                services_health[route] = "unhealthy"
+            else:
+                services_health[route] = "healthy"
+        
+        _health_cache["ts"] = time.monotonic()
+        _health_cache["value"] = services_health
+        _health_cache["body"] = orjson.dumps({
+            "status": "healthy",
+            "timestamp": "2024-01-01T00:00:00Z",
+            "services": services_health
+        })
     
     return services_health
 
 
+if settings.enable_metrics:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Several uvicorn workers: aggregate every worker's metric files on scrape
+        metrics_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(metrics_registry)
+    else:
+        metrics_registry = REGISTRY
+    
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus scrape endpoint, on an exact route so scrapes are never redirected"""
+        return Response(generate_latest(metrics_registry), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.api_route("/api/v1/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def api_proxy(request: Request, path: str):
     """Proxy API requests to appropriate services"""
-    request_path = f"/api/v1/{path}"
-    
     # Find matching service route
-    target_service = None
-    service_path = None
-    
-    for route_prefix, service_url in SERVICE_ROUTES.items():
-        if request_path.startswith(route_prefix):
-            target_service = service_url
-            service_path = request_path[len(route_prefix):]
-            break
+    segment, separator, remainder = path.partition("/")
+    target_service = SERVICE_SEGMENTS.get(segment)
     
     if not target_service:
         raise HTTPException(status_code=404, detail="Service not found")
     
+    service_path = f"{separator}{remainder}"
+    
     return await proxy_request(request, target_service, service_path)
 
 
@@ -191,7 +282,7 @@ async def api_proxy(request: Request, path: str):
 @app.exception_handler(ServiceError)
 async def service_error_handler(request: Request, exc: ServiceError):
     """Handle service errors"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
@@ -204,7 +295,7 @@ async def service_error_handler(request: Request, exc: ServiceError):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
@@ -218,7 +309,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions"""
     logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -234,5 +325,13 @@ if __name__ == "__main__":
         "main:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=settings.debug
+        workers=settings.api_workers,
+        loop="uvloop",
+        http="httptools",
+        proxy_headers=True,
+        server_header=False,
+        date_header=False,
+        access_log=False,
+        # Reload pins uvicorn to a single process, so it is opt-in for local dev only
+        reload=settings.dev_reload
     )
\ No newline at end of file
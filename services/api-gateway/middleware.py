@@ -1,44 +1,67 @@
+import random
+import re
 import time
 from typing import Callable
 from fastapi import Request, Response
+from prometheus_client import Counter, Histogram
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.routing import Match
 import structlog
 
 logger = structlog.get_logger()
 
+# Prometheus metrics
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "Total HTTP requests",
+    ["method", "route", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration in seconds",
+    ["method", "route"]
+)
+
 
 class LoggingMiddleware(BaseHTTPMiddleware):
     """Middleware for request/response logging"""
     
+    # Probe endpoints that would otherwise dominate the logs
+    SKIP_PATHS = frozenset(("/", "/health", "/metrics"))
+    
+    def __init__(self, app, sample_rate: float = 1.0):
+        super().__init__(app)
+        # Fraction of successful (2xx) requests to log; errors are always logged
+        self.sample_rate = sample_rate
+    
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
-        
-        # Log request
-        logger.info(
-            "Request started",
-            method=request.method,
-            url=str(request.url),
-            client_ip=request.client.host if request.client else None
-        )
+        start_time = time.perf_counter()
         
         # Process request
         response = await call_next(request)
         
         # Calculate processing time
-        process_time = time.time() - start_time
+        process_time = time.perf_counter() - start_time
+        
+        # Add processing time header
+        response.headers["X-Process-Time"] = str(process_time)
+        
+        if request.url.path in self.SKIP_PATHS:
+            return response
+        
+        if 200 <= response.status_code < 300 and random.random() >= self.sample_rate:
+            return response
         
         # Log response
         logger.info(
             "Request completed",
             method=request.method,
             url=str(request.url),
+            client_ip=request.client.host if request.client else None,
             status_code=response.status_code,
             process_time=round(process_time, 4)
         )
         
-        # Add processing time header
-        response.headers["X-Process-Time"] = str(process_time)
-        
         return response
 
 
@@ -51,13 +74,19 @@ class AuthMiddleware(BaseHTTPMiddleware):
         "/health",
         "/docs",
         "/openapi.json",
+        "/metrics",
         "/api/v1/auth/login",
         "/api/v1/auth/register"
     ]
     
+    # Public routes compiled once; each route matches itself and its sub-paths
+    _PUBLIC_RE = re.compile(
+        r"^(?:" + "|".join(re.escape(route) for route in PUBLIC_ROUTES) + r")(?:/|$)"
+    )
+    
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Skip authentication for public routes
-        if any(request.url.path.startswith(route) for route in self.PUBLIC_ROUTES):
+        if self._PUBLIC_RE.match(request.url.path):
             return await call_next(request)
         
         # For now, just pass through - authentication will be handled by individual services
@@ -68,28 +97,25 @@ class AuthMiddleware(BaseHTTPMiddleware):
 class MetricsMiddleware(BaseHTTPMiddleware):
     """Middleware for collecting metrics"""
     
-    def __init__(self, app):
-        super().__init__(app)
-        self.request_count = 0
-        self.request_duration_sum = 0.0
-    
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
-        
-        # Increment request counter
-        self.request_count += 1
+        start_time = time.perf_counter()
         
         # Process request
         response = await call_next(request)
         
-        # Calculate duration
-        duration = time.time() - start_time
-        self.request_duration_sum += duration
-        
-        # Add metrics headers
-        response.headers["X-Request-Count"] = str(self.request_count)
-        response.headers["X-Average-Duration"] = str(
-            round(self.request_duration_sum / self.request_count, 4)
-        )
+        # Record metrics; exposition happens on the /metrics scrape, not here
+        duration = time.perf_counter() - start_time
+        route = _route_template(request)
+        REQUEST_COUNT.labels(request.method, route, response.status_code).inc()
+        REQUEST_DURATION.labels(request.method, route).observe(duration)
         
-        return response
\ No newline at end of file
+        return response
+
+
+def _route_template(request: Request) -> str:
+    """Return the matched route template to keep metric label cardinality bounded"""
+    for route in request.app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
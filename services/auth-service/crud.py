@@ -1,35 +1,65 @@
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select, update
+from sqlalchemy.engine import Row
 
 import sys
 sys.path.append('/app/shared')
 
-from models import User, UserCreate, UserUpdate
-from utils import hash_password
+from models import UserCreate, UserUpdate
+from utils import hash_password_async
+from database import User, settings
 
 
 class UserCRUD:
     """CRUD operations for User model"""
     
-    def get(self, db: Session, user_id: UUID) -> Optional[User]:
+    async def get(self, db: AsyncSession, user_id: UUID) -> Optional[User]:
         """Get user by ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        return await db.get(User, user_id)
     
-    def get_by_email(self, db: Session, email: str) -> Optional[User]:
-        """Get user by email"""
-        return db.query(User).filter(User.email == email).first()
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        """Get user by email (case-insensitive)"""
+        result = await db.execute(
+            select(User).where(func.lower(User.email) == email.lower()).limit(1)
+        )
+        return result.scalar_one_or_none()
     
-    def get_by_username(self, db: Session, username: str) -> Optional[User]:
+    async def get_by_username(self, db: AsyncSession, username: str) -> Optional[User]:
         """Get user by username"""
-        return db.query(User).filter(User.username == username).first()
+        result = await db.execute(
+            select(User).where(User.username == username).limit(1)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_by_email_or_username(
+        self, 
+        db: AsyncSession, 
+        email: str, 
+        username: str
+    ) -> Optional[Row]:
+        """Get the (email, username) of a user matching either value, email matches first"""
+        email_match = func.lower(User.email) == email.lower()
+        result = await db.execute(
+            select(User.email, User.username)
+            .where(or_(email_match, User.username == username))
+            .order_by(email_match.desc())
+            .limit(1)
+        )
+        return result.first()
     
-    def create(self, db: Session, user_data: UserCreate) -> User:
-        """Create new user"""
+    async def create(
+        self, 
+        db: AsyncSession, 
+        user_data: UserCreate, 
+        password_hash: Optional[str] = None
+    ) -> User:
+        """Create new user, hashing the password unless a hash is supplied"""
         # Hash password
-        password_hash = hash_password(user_data.password)
+        if password_hash is None:
+            password_hash = await hash_password_async(user_data.password, settings.bcrypt_rounds)
         
         # Create user object
         db_user = User(
@@ -44,67 +74,74 @@ class UserCRUD:
         
         # Add to database
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         return db_user
     
-    def update(self, db: Session, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
+    async def update(
+        self, 
+        db: AsyncSession, 
+        user_id: UUID, 
+        user_data: UserUpdate
+    ) -> Optional[User]:
         """Update user"""
-        db_user = self.get(db, user_id)
+        db_user = await self.get(db, user_id)
         if not db_user:
             return None
         
         # Update fields
-        update_data = user_data.dict(exclude_unset=True)
+        update_data = user_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_user, field, value)
         
         db_user.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         return db_user
     
-    def update_last_login(self, db: Session, user_id: UUID) -> None:
+    async def update_last_login(self, db: AsyncSession, user_id: UUID) -> None:
         """Update user's last login timestamp"""
-        db_user = self.get(db, user_id)
-        if db_user:
-            db_user.last_login = datetime.utcnow()
-            db.commit()
+        await db.execute(
+            update(User).where(User.id == user_id).values(last_login=func.now())
+        )
+        await db.commit()
     
-    def delete(self, db: Session, user_id: UUID) -> bool:
+    async def delete(self, db: AsyncSession, user_id: UUID) -> bool:
         """Delete user"""
-        db_user = self.get(db, user_id)
+        db_user = await self.get(db, user_id)
         if not db_user:
             return False
         
-        db.delete(db_user)
-        db.commit()
+        await db.delete(db_user)
+        await db.commit()
         
         return True
     
-    def list_users(
+    async def list_users(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         skip: int = 0, 
         limit: int = 100,
         is_active: Optional[bool] = None
     ) -> list[User]:
         """List users with pagination"""
-        query = db.query(User)
+        query = select(User)
         
         if is_active is not None:
-            query = query.filter(User.is_active == is_active)
+            query = query.where(User.is_active == is_active)
         
-        return query.offset(skip).limit(limit).all()
+        result = await db.execute(query.offset(skip).limit(limit))
+        return list(result.scalars().all())
     
-    def count_users(self, db: Session, is_active: Optional[bool] = None) -> int:
+    async def count_users(self, db: AsyncSession, is_active: Optional[bool] = None) -> int:
         """Count total users"""
-        query = db.query(User)
+        query = select(func.count()).select_from(User)
         
         if is_active is not None:
-            query = query.filter(User.is_active == is_active)
+            query = query.where(User.is_active == is_active)
         
-        return query.count()
\ No newline at end of file
+        result = await db.execute(query)
+        return result.scalar_one()
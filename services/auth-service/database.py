@@ -1,8 +1,8 @@
-from sqlalchemy import create_engine, Column, String, Boolean, DateTime, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Index, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import UUID
-import redis
+import redis.asyncio as aioredis
 import uuid
 from datetime import datetime
 
@@ -14,13 +14,32 @@ from config import AuthServiceSettings
 # Settings
 settings = AuthServiceSettings()
 
-# Database setup
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Database setup (asyncpg driver so queries never block the event loop)
+engine = create_async_engine(
+    settings.database_url.replace("postgresql://", "postgresql+asyncpg://", 1),
+    pool_size=settings.worker_pool_size,
+    max_overflow=settings.worker_max_overflow,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_use_lifo=True  # Keep a small hot set of connections warm
+)
+SessionLocal = async_sessionmaker(
+    bind=engine, 
+    autoflush=False, 
+    expire_on_commit=False
+)
 Base = declarative_base()
 
 # Redis setup
-redis_client = redis.from_url(settings.redis_url)
+# Blocking pool: at the cap, callers wait for a free connection instead of failing
+redis_client = aioredis.Redis(
+    connection_pool=aioredis.BlockingConnectionPool.from_url(
+        settings.redis_url, 
+        decode_responses=True, 
+        max_connections=settings.redis_max_connections, 
+        timeout=settings.redis_pool_timeout
+    )
+)
 
 
 # Database models
@@ -37,16 +56,17 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime)
     last_login = Column(DateTime)
+    
+    __table_args__ = (
+        Index("idx_users_email_lower", func.lower(email)),
+    )
 
 
 # Dependency functions
-def get_db():
+async def get_db():
     """Get database session"""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def get_redis():
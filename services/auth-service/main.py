@@ -1,12 +1,17 @@
+import hashlib
 import sys
+import time
 from datetime import datetime, timedelta
 from typing import Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Depends, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-import redis
+from sqlalchemy.ext.asyncio import AsyncSession
+import orjson
+import redis.asyncio as aioredis
 
 # Add shared modules to path
 sys.path.append('/app/shared')
@@ -14,7 +19,7 @@ sys.path.append('/app/shared')
 from config import AuthServiceSettings
 from models import User, UserCreate, UserLogin, Token, BaseResponse
 from utils import (
-    setup_logging, hash_password, verify_password, 
+    setup_logging, hash_password_async, verify_password_async, 
     create_access_token, verify_token, validate_email
 )
 from database import get_db, get_redis
@@ -30,21 +35,35 @@ security = HTTPBearer()
 app = FastAPI(
     title="Authentication Service",
     description="User authentication and authorization service",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Initialize CRUD
 user_crud = UserCRUD()
 
+# Verified token -> (user, exp), so repeat verifications skip crypto, Redis and the DB.
+# Per-process: logout evicts locally, other workers expire within the TTL.
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl)
+
+
+def token_cache_key(token: str) -> str:
+    """Cache key for a raw bearer token"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# Static root body, serialized once at import
+ROOT_BODY = orjson.dumps({
+    "service": "auth-service",
+    "version": "1.0.0",
+    "status": "healthy"
+})
+
 
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "service": "auth-service",
-        "version": "1.0.0",
-        "status": "healthy"
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
@@ -60,7 +79,7 @@ async def health_check():
 @app.post("/register", response_model=BaseResponse)
 async def register_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
     try:
@@ -72,22 +91,26 @@ async def register_user(
             )
         
         # Check if user already exists
-        existing_user = user_crud.get_by_email(db, user_data.email)
-        if existing_user:
+        existing_user = await user_crud.get_by_email_or_username(
+            db, user_data.email, user_data.username
+        )
+        if existing_user and existing_user.email.lower() == user_data.email.lower():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
         
-        existing_user = user_crud.get_by_username(db, user_data.username)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
             )
         
+        # Hash off the event loop; bcrypt is deliberately CPU-bound
+        password_hash = await hash_password_async(user_data.password, settings.bcrypt_rounds)
+        
         # Create user
-        user = user_crud.create(db, user_data)
+        user = await user_crud.create(db, user_data, password_hash)
         
         logger.info(f"User registered successfully: {user.email}")
         
@@ -109,18 +132,19 @@ async def register_user(
 @app.post("/login", response_model=Token)
 async def login_user(
     login_data: UserLogin,
-    db: Session = Depends(get_db),
-    redis_client: redis.Redis = Depends(get_redis)
+    db: AsyncSession = Depends(get_db)
 ):
     """Authenticate user and return access token"""
     try:
         # Get user by username or email
-        user = user_crud.get_by_username(db, login_data.username)
+        user = await user_crud.get_by_username(db, login_data.username)
         if not user:
-            user = user_crud.get_by_email(db, login_data.username)
+            user = await user_crud.get_by_email(db, login_data.username)
         
-        # Verify user and password
-        if not user or not verify_password(login_data.password, user.password_hash):
+        # Verify user and password (off the event loop)
+        if not user or not await verify_password_async(
+            login_data.password, user.password_hash
+        ):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
@@ -137,7 +161,8 @@ async def login_user(
             "sub": str(user.id),
             "username": user.username,
             "email": user.email,
-            "role": user.role
+            "role": user.role,
+            "jti": uuid4().hex
         }
         
         expires_delta = timedelta(minutes=settings.jwt_expire_minutes)
@@ -149,14 +174,7 @@ async def login_user(
         )
         
         # Update last login
-        user_crud.update_last_login(db, user.id)
-        
-        # Store token in Redis for session management
-        redis_client.setex(
-            f"token:{user.id}",
-            settings.jwt_expire_minutes * 60,
-            access_token
-        )
+        await user_crud.update_last_login(db, user.id)
         
         logger.info(f"User logged in successfully: {user.email}")
         
@@ -179,7 +197,7 @@ async def login_user(
 @app.post("/logout", response_model=BaseResponse)
 async def logout_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    redis_client: redis.Redis = Depends(get_redis)
+    redis_client: aioredis.Redis = Depends(get_redis)
 ):
     """Logout user and invalidate token"""
     try:
@@ -198,8 +216,13 @@ async def logout_user(
         
         user_id = token_data.get("sub")
         
-        # Remove token from Redis
-        redis_client.delete(f"token:{user_id}")
+        token_cache.pop(token_cache_key(credentials.credentials), None)
+        
+        # Revoke the token until it would have expired anyway
+        jti = token_data.get("jti")
+        remaining_ttl = int(token_data.get("exp", 0) - time.time())
+        if jti and remaining_ttl > 0:
+            await redis_client.set(f"revoked:{jti}", "1", ex=remaining_ttl)
         
         logger.info(f"User logged out successfully: {user_id}")
         
@@ -218,14 +241,22 @@ async def logout_user(
         )
 
 
-@app.get("/verify", response_model=User)
-async def verify_token_endpoint(
+async def current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-    redis_client: redis.Redis = Depends(get_redis)
-):
-    """Verify token and return user information"""
+    db: AsyncSession = Depends(get_db),
+    redis_client: aioredis.Redis = Depends(get_redis)
+) -> User:
+    """Dependency resolving the bearer token to its active user"""
     try:
+        cache_key = token_cache_key(credentials.credentials)
+        cached = token_cache.get(cache_key)
+        if cached is not None:
+            cached_user, exp = cached
+            # The TTL runs from insertion, so the token may have expired since
+            if exp is None or exp > time.time():
+                return cached_user
+            token_cache.pop(cache_key, None)
+        
         # Verify token
         token_data = verify_token(
             credentials.credentials,
@@ -241,16 +272,16 @@ async def verify_token_endpoint(
         
         user_id = token_data.get("sub")
         
-        # Check if token exists in Redis
-        stored_token = redis_client.get(f"token:{user_id}")
-        if not stored_token or stored_token.decode() != credentials.credentials:
+        # Reject tokens revoked by logout; the signature check above covers expiry
+        jti = token_data.get("jti")
+        if settings.jwt_check_revocation and jti and await redis_client.exists(f"revoked:{jti}"):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token not found or expired"
+                detail="Token has been revoked"
             )
         
         # Get user from database
-        user = user_crud.get(db, UUID(user_id))
+        user = await user_crud.get(db, UUID(user_id))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -263,7 +294,10 @@ async def verify_token_endpoint(
                 detail="Account is disabled"
             )
         
-        return user
+        cached_user = User.model_validate(user)
+        token_cache[cache_key] = (cached_user, token_data.get("exp"))
+        
+        return cached_user
     
     except HTTPException:
         raise
@@ -275,14 +309,16 @@ async def verify_token_endpoint(
         )
 
 
+@app.get("/verify", response_model=User)
+async def verify_token_endpoint(user: User = Depends(current_user)) -> User:
+    """Verify token and return user information"""
+    return user
+
+
 @app.get("/me", response_model=User)
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-    redis_client: redis.Redis = Depends(get_redis)
-):
+async def get_current_user(user: User = Depends(current_user)) -> User:
     """Get current user information"""
-    return await verify_token_endpoint(credentials, db, redis_client)
+    return user
 
 
 if __name__ == "__main__":
@@ -291,5 +327,13 @@ if __name__ == "__main__":
         "main:app",
         host=settings.api_host,
         port=settings.service_port,
-        reload=settings.debug
+        workers=settings.api_workers,
+        loop="uvloop",
+        http="httptools",
+        proxy_headers=True,
+        server_header=False,
+        date_header=False,
+        access_log=False,
+        # Reload pins uvicorn to a single process, so it is opt-in for local dev only
+        reload=settings.dev_reload
     )
\ No newline at end of file
@@ -1,28 +1,34 @@
+import asyncio
 import os
 import sys
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from urllib.parse import quote
 from uuid import UUID
 
-import aiofiles
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status, Form
-from fastapi.responses import FileResponse
+from fastapi import (
+    FastAPI, File, UploadFile, HTTPException, Depends, Header, status, Form,
+    BackgroundTasks
+)
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 import magic
+import redis.asyncio as aioredis
 
 # Add shared modules to path
 sys.path.append('/app/shared')
 
 from config import FileServiceSettings
 from models import (
-    File as FileModel, FileCreate, FileMetadata, 
+    File as FileModel, FileCreate, FileMetadata, FileType, 
     BaseResponse, FileUploadResponse, PaginatedResponse
 )
 from utils import (
-    setup_logging, generate_unique_filename, generate_file_hash,
-    ensure_directory_exists, get_file_size, is_valid_file_type,
+    setup_logging, generate_unique_filename,
+    ensure_directory_exists, is_valid_file_type, paginate,
+    new_file_hasher,
     ServiceError, ValidationError, NotFoundError
 )
 from database import get_db
@@ -39,16 +45,176 @@ settings = FileServiceSettings()
 app = FastAPI(
     title="File Management Service",
     description="File upload, storage, and metadata management service",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Initialize CRUD and metadata extractor
 file_crud = FileCRUD()
 metadata_extractor = MetadataExtractor()
 
+# Redis cache for file records, which rarely change after upload
+# Blocking pool: at the cap, callers wait for a free connection instead of failing
+redis_client = aioredis.Redis(
+    connection_pool=aioredis.BlockingConnectionPool.from_url(
+        settings.redis_url, 
+        decode_responses=True, 
+        max_connections=settings.redis_max_connections, 
+        timeout=settings.redis_pool_timeout
+    )
+)
+
 # Ensure storage directory exists
 ensure_directory_exists(settings.storage_path)
 
+# Concurrency cap for CPU/IO-heavy work: uploads and metadata extraction
+WORK_CONCURRENCY = settings.api_workers * 2
+
+# Bounds in-flight upload work (disk write, hashing, metadata extraction)
+upload_semaphore = asyncio.Semaphore(WORK_CONCURRENCY)
+
+# Bounds concurrent metadata extractions during bulk reprocessing
+reprocess_semaphore = asyncio.Semaphore(WORK_CONCURRENCY)
+
+# Allowed MIME and file types, hashed once for constant-time membership checks
+ALLOWED_MIME_TYPES = frozenset(settings.allowed_file_types)
+ALLOWED_FILE_TYPES = frozenset(file_type.value for file_type in FileType)
+
+# Bytes of an upload inspected by libmagic; it only looks at the file header
+MIME_SNIFF_SIZE = 8192
+
+# libmagic cookie loaded once and shared by all requests (calls are serialized
+# by python-magic's internal lock)
+MIME_DETECTOR = magic.Magic(mime=True)
+
+# Read sizes for streaming uploads to disk and downloads to clients
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+class _HashingWriter:
+    """Writable wrapper hashing and counting every chunk before writing it"""
+    
+    def __init__(self, dest, hasher):
+        self.dest = dest
+        self.hasher = hasher
+        self.size = 0
+    
+    def write(self, chunk: bytes) -> int:
+        # dest is a raw FileIO, whose write may be partial, so loop until it all lands
+        view = memoryview(chunk)
+        while view:
+            view = view[self.dest.write(view):]
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+        return len(chunk)
+
+
+def _save_and_hash(
+    upload: UploadFile, 
+    dest: Path, 
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> Tuple[int, str]:
+    """Copy an upload to dest in chunks and return its size and SHA-256 (blocking)"""
+    upload.file.seek(0)
+    with open(dest, 'wb', buffering=0) as f:
+        writer = _HashingWriter(f, new_file_hasher())
+        shutil.copyfileobj(upload.file, writer, chunk_size)
+    return writer.size, writer.hasher.hexdigest()
+
+
+class LargeFileResponse(FileResponse):
+    """FileResponse streaming in larger chunks to cut per-chunk overhead"""
+    chunk_size = DOWNLOAD_CHUNK_SIZE
+
+
+def parse_byte_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single 'bytes=start-end' Range header into inclusive offsets"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None  # Unsupported ranges fall back to the full file
+    
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = min(int(end_str), file_size - 1) if end_str else file_size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(file_size - int(end_str), 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+    
+    if start > end or start >= file_size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    
+    return start, end
+
+
+async def iter_file_range(path: str, start: int, end: int):
+    """Yield the inclusive byte range [start, end] of a file in chunks"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def get_file_for_user(db: Session, file_id: UUID, user):
+    """Get a file record the user may access; other users' files are reported as not found"""
+    file_record = file_crud.get(db, file_id)
+    if file_record and (user.role == "admin" or file_record.owner_id == user.id):
+        return file_record
+    return None
+
+
+def file_cache_key(file_id: UUID) -> str:
+    """Redis key of a cached file record"""
+    return f"file:{file_id}"
+
+
+async def get_file_cached(db: Session, file_id: UUID, user) -> Optional[FileModel]:
+    """Get a file record the user may access, served from Redis when cached"""
+    key = file_cache_key(file_id)
+    try:
+        cached = await redis_client.get(key)
+        if cached:
+            file_model = FileModel.model_validate_json(cached)
+            if user.role == "admin" or file_model.owner_id == user.id:
+                return file_model
+            return None
+    except aioredis.RedisError as e:
+        logger.warning(f"File cache read failed: {str(e)}")
+    
+    file_record = get_file_for_user(db, file_id, user)
+    if not file_record:
+        return None
+    
+    file_model = FileModel.model_validate(file_record)
+    try:
+        await redis_client.setex(key, settings.file_cache_ttl, file_model.model_dump_json())
+    except aioredis.RedisError as e:
+        logger.warning(f"File cache write failed: {str(e)}")
+    
+    return file_model
+
+
+async def invalidate_file_cache(file_id: UUID) -> None:
+    """Drop a file record from the Redis cache"""
+    try:
+        await redis_client.delete(file_cache_key(file_id))
+    except aioredis.RedisError as e:
+        logger.warning(f"File cache invalidation failed: {str(e)}")
+
 
 @app.get("/")
 async def root():
@@ -72,15 +238,20 @@ async def health_check():
     }
 
 
-@app.post("/upload", response_model=FileUploadResponse)
+@app.post(
+    "/upload", 
+    response_model=FileUploadResponse, 
+    status_code=status.HTTP_202_ACCEPTED
+)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     project_id: str = Form(...),
     file_type: str = Form(...),
     file: UploadFile = File(...),
     current_user = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
-    """Upload a file and extract metadata"""
+    """Upload a file; metadata is extracted after the response is sent"""
     try:
         # Validate project_id format
         try:
@@ -89,21 +260,20 @@ async def upload_file(
             raise ValidationError("Invalid project ID format")
         
         # Validate file type
-        if file_type not in ["image", "orthomosaic", "point_cloud", "dsm", "dtm", "satellite"]:
+        if file_type not in ALLOWED_FILE_TYPES:
             raise ValidationError("Invalid file type")
         
         # Check file size
         if file.size and file.size > settings.max_file_size:
             raise ValidationError(f"File size exceeds maximum allowed size of {settings.max_file_size} bytes")
         
-        # Detect MIME type
-        file_content = await file.read()
-        await file.seek(0)  # Reset file pointer
+        # Detect MIME type from the file header
+        head = await file.read(MIME_SNIFF_SIZE)
         
-        mime_type = magic.from_buffer(file_content, mime=True)
+        mime_type = MIME_DETECTOR.from_buffer(head)
         
         # Validate file type
-        if not is_valid_file_type(mime_type, settings.allowed_file_types):
+        if not is_valid_file_type(mime_type, ALLOWED_MIME_TYPES):
             raise ValidationError(f"File type {mime_type} is not allowed")
         
         # Generate unique filename
@@ -116,19 +286,9 @@ async def upload_file(
         # Save file to storage
         file_path = project_dir / unique_filename
         
-        async with aiofiles.open(file_path, 'wb') as f:
-            await file.seek(0)
-            content = await file.read()
-            await f.write(content)
-        
-        # Generate file hash
-        file_hash = generate_file_hash(file_path)
-        
-        # Extract metadata
-        metadata = await metadata_extractor.extract_metadata(file_path, mime_type)
-        
-        # Get actual file size
-        actual_size = get_file_size(file_path)
+        # Stream to disk and hash in one worker-thread dispatch
+        async with upload_semaphore:
+            actual_size, file_hash = await asyncio.to_thread(_save_and_hash, file, file_path)
         
         # Create file record
         file_data = FileCreate(
@@ -141,17 +301,20 @@ async def upload_file(
             owner_id=current_user.id,
             storage_path=str(file_path),
             checksum=file_hash,
-            metadata=metadata
+            metadata=None
         )
         
         # Save to database
         db_file = file_crud.create(db, file_data)
         
+        # Extract metadata off the request path
+        background_tasks.add_task(finalize_upload, db_file.id, file_path, mime_type)
+        
         logger.info(f"File uploaded successfully: {file.filename} -> {unique_filename}")
         
         return FileUploadResponse(
             success=True,
-            message="File uploaded successfully",
+            message="File uploaded successfully, metadata extraction pending",
             file=db_file
         )
     
@@ -169,6 +332,36 @@ async def upload_file(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def extract_metadata_off_loop(file_path, mime_type: str):
+    """Extract metadata on a worker thread's own event loop, keeping the CPU work off ours"""
+    return await asyncio.to_thread(
+        asyncio.run, 
+        metadata_extractor.extract_metadata(file_path, mime_type)
+    )
+
+
+async def finalize_upload(file_id: UUID, file_path: Path, mime_type: str) -> None:
+    """Extract and store metadata for an uploaded file"""
+    try:
+        async with upload_semaphore:
+            metadata = await extract_metadata_off_loop(file_path, mime_type)
+        
+        # Request-scoped sessions are closed by now; drive get_db by hand
+        db_session = get_db()
+        db = next(db_session)
+        try:
+            file_crud.update_metadata(db, file_id, metadata)
+        finally:
+            db_session.close()
+        
+        await invalidate_file_cache(file_id)
+        
+        logger.info(f"File metadata extracted: {file_id}")
+    
+    except Exception as e:
+        logger.error(f"Error extracting metadata for file {file_id}: {str(e)}")
+
+
 @app.get("/files/{file_id}", response_model=FileModel)
 async def get_file_info(
     file_id: UUID,
@@ -177,16 +370,14 @@ async def get_file_info(
 ):
     """Get file information"""
     try:
-        file_record = file_crud.get(db, file_id)
+        file_record = await get_file_cached(db, file_id, current_user)
         if not file_record:
             raise NotFoundError("File not found")
         
-        # Check if user has access to this file
-        if file_record.owner_id != current_user.id and current_user.role != "admin":
-            raise HTTPException(status_code=403, detail="Access denied")
-        
         return file_record
     
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
     except HTTPException:
         raise
     except Exception as e:
@@ -197,29 +388,49 @@ async def get_file_info(
 @app.get("/files/{file_id}/download")
 async def download_file(
     file_id: UUID,
+    range_header: Optional[str] = Header(None, alias="Range"),
     current_user = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
-    """Download a file"""
+    """Download a file, honouring a single byte range for resumed downloads"""
     try:
-        file_record = file_crud.get(db, file_id)
+        file_record = get_file_for_user(db, file_id, current_user)
         if not file_record:
             raise NotFoundError("File not found")
         
-        # Check if user has access to this file
-        if file_record.owner_id != current_user.id and current_user.role != "admin":
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        # Check if file exists on disk
-        if not os.path.exists(file_record.storage_path):
+        # Check if file exists on disk; the stat result is reused by the response
+        try:
+            file_stat = os.stat(file_record.storage_path)
+        except FileNotFoundError:
             raise NotFoundError("File not found on storage")
         
-        return FileResponse(
+        byte_range = parse_byte_range(range_header, file_stat.st_size) if range_header else None
+        if byte_range:
+            start, end = byte_range
+            return StreamingResponse(
+                iter_file_range(file_record.storage_path, start, end),
+                status_code=206,
+                media_type=file_record.mime_type,
+                headers={
+                    "Accept-Ranges": "bytes",
+                    "Content-Range": f"bytes {start}-{end}/{file_stat.st_size}",
+                    "Content-Length": str(end - start + 1),
+                    "Content-Disposition": (
+                        f"attachment; filename*=utf-8''{quote(file_record.original_filename)}"
+                    )
+                }
+            )
+        
+        return LargeFileResponse(
             path=file_record.storage_path,
             filename=file_record.original_filename,
-            media_type=file_record.mime_type
+            media_type=file_record.mime_type,
+            stat_result=file_stat,
+            headers={"Accept-Ranges": "bytes"}
         )
     
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
     except HTTPException:
         raise
     except Exception as e:
@@ -235,20 +446,17 @@ async def delete_file(
 ):
     """Delete a file"""
     try:
-        file_record = file_crud.get(db, file_id)
+        file_record = get_file_for_user(db, file_id, current_user)
         if not file_record:
             raise NotFoundError("File not found")
         
-        # Check if user has access to this file
-        if file_record.owner_id != current_user.id and current_user.role != "admin":
-            raise HTTPException(status_code=403, detail="Access denied")
-        
         # Delete file from storage
         if os.path.exists(file_record.storage_path):
             os.remove(file_record.storage_path)
         
         # Delete from database
         file_crud.delete(db, file_id)
+        await invalidate_file_cache(file_id)
         
         logger.info(f"File deleted successfully: {file_record.filename}")
         
@@ -257,6 +465,8 @@ async def delete_file(
             message="File deleted successfully"
         )
     
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
     except HTTPException:
         raise
     except Exception as e:
@@ -264,6 +474,38 @@ async def delete_file(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def list_files_page(
+    db: Session,
+    message: str,
+    project_id: Optional[UUID],
+    file_type: Optional[str],
+    owner_id: Optional[UUID],
+    page: int,
+    size: int
+) -> PaginatedResponse:
+    """Fetch one page of files with its pagination metadata"""
+    files, total = file_crud.list_files(
+        db=db,
+        project_id=project_id,
+        file_type=file_type,
+        owner_id=owner_id,
+        skip=(page - 1) * size,
+        limit=size
+    )
+    
+    pagination = paginate(page, size, total)
+    
+    return PaginatedResponse(
+        success=True,
+        message=message,
+        total=pagination.total,
+        page=pagination.page,
+        size=pagination.size,
+        pages=pagination.pages,
+        data=files
+    )
+
+
 @app.get("/files", response_model=PaginatedResponse)
 async def list_files(
     project_id: Optional[UUID] = None,
@@ -278,25 +520,14 @@ async def list_files(
         # For non-admin users, only show their own files
         owner_id = None if current_user.role == "admin" else current_user.id
         
-        files, total = file_crud.list_files(
+        return list_files_page(
             db=db,
+            message="Files retrieved successfully",
             project_id=project_id,
             file_type=file_type,
             owner_id=owner_id,
-            skip=(page - 1) * size,
-            limit=size
-        )
-        
-        pages = (total + size - 1) // size
-        
-        return PaginatedResponse(
-            success=True,
-            message="Files retrieved successfully",
-            total=total,
             page=page,
-            size=size,
-            pages=pages,
-            data=files
+            size=size
         )
     
     except Exception as e:
@@ -318,25 +549,14 @@ async def list_project_files(
         # For non-admin users, only show their own files
         owner_id = None if current_user.role == "admin" else current_user.id
         
-        files, total = file_crud.list_files(
+        return list_files_page(
             db=db,
+            message="Project files retrieved successfully",
             project_id=project_id,
             file_type=file_type,
             owner_id=owner_id,
-            skip=(page - 1) * size,
-            limit=size
-        )
-        
-        pages = (total + size - 1) // size
-        
-        return PaginatedResponse(
-            success=True,
-            message="Project files retrieved successfully",
-            total=total,
             page=page,
-            size=size,
-            pages=pages,
-            data=files
+            size=size
         )
     
     except Exception as e:
@@ -352,26 +572,23 @@ async def reprocess_file_metadata(
 ):
     """Reprocess file metadata"""
     try:
-        file_record = file_crud.get(db, file_id)
+        file_record = get_file_for_user(db, file_id, current_user)
         if not file_record:
             raise NotFoundError("File not found")
         
-        # Check if user has access to this file
-        if file_record.owner_id != current_user.id and current_user.role != "admin":
-            raise HTTPException(status_code=403, detail="Access denied")
-        
         # Check if file exists on disk
         if not os.path.exists(file_record.storage_path):
             raise NotFoundError("File not found on storage")
         
         # Extract metadata again
-        metadata = await metadata_extractor.extract_metadata(
+        metadata = await extract_metadata_off_loop(
             file_record.storage_path, 
             file_record.mime_type
         )
         
         # Update file record
         file_crud.update_metadata(db, file_id, metadata)
+        await invalidate_file_cache(file_id)
         
         logger.info(f"File metadata reprocessed: {file_record.filename}")
         
@@ -380,6 +597,8 @@ async def reprocess_file_metadata(
             message="File metadata reprocessed successfully"
         )
     
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
     except HTTPException:
         raise
     except Exception as e:
@@ -387,11 +606,102 @@ async def reprocess_file_metadata(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.post("/files/reprocess", response_model=BaseResponse)
+async def reprocess_project_metadata(
+    project_id: UUID,
+    current_user = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """Reprocess metadata for every file of a project in parallel"""
+    try:
+        # For non-admin users, only reprocess their own files
+        owner_id = None if current_user.role == "admin" else current_user.id
+        
+        async def extract(file_record):
+            async with reprocess_semaphore:
+                return await extract_metadata_off_loop(
+                    file_record.storage_path, 
+                    file_record.mime_type
+                )
+        
+        # Page through the whole project, one bounded batch at a time
+        reprocessed = failed = missing = 0
+        skip = 0
+        while True:
+            batch, _ = file_crud.list_files(
+                db=db,
+                project_id=project_id,
+                file_type=None,
+                owner_id=owner_id,
+                skip=skip,
+                limit=settings.reprocess_batch_limit
+            )
+            skip += len(batch)
+            
+            files = []
+            for file_record in batch:
+                if os.path.exists(file_record.storage_path):
+                    files.append(file_record)
+                else:
+                    logger.warning(f"Skipping {file_record.filename}: not found on storage")
+            missing += len(batch) - len(files)
+            
+            results = await asyncio.gather(
+                *(extract(f) for f in files), 
+                return_exceptions=True
+            )
+            
+            updates = {}
+            for file_record, result in zip(files, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error reprocessing {file_record.filename}: {str(result)}")
+                else:
+                    updates[file_record.id] = result
+            
+            for file_id, metadata in updates.items():
+                file_crud.update_metadata(db, file_id, metadata)
+            if updates:
+                await asyncio.gather(*(invalidate_file_cache(file_id) for file_id in updates))
+            
+            reprocessed += len(updates)
+            failed += len(files) - len(updates)
+            
+            if len(batch) < settings.reprocess_batch_limit:
+                break
+        
+        logger.info(
+            f"Project metadata reprocessed: {project_id} "
+            f"({reprocessed} ok, {failed} failed, {missing} missing)"
+        )
+        
+        return BaseResponse(
+            success=failed == 0 and missing == 0,
+            message=(
+                f"Reprocessed metadata for {reprocessed} files, {failed} failed, "
+                f"{missing} missing from storage"
+            )
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reprocessing project metadata: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "main:app",
         host=settings.api_host,
         port=settings.service_port,
-        reload=settings.debug
+        workers=settings.api_workers,
+        loop="uvloop",
+        http="httptools",
+        proxy_headers=True,
+        server_header=False,
+        date_header=False,
+        access_log=False,
+        # Reload pins uvicorn to a single process, so it is opt-in for local dev only
+        reload=settings.dev_reload
     )
\ No newline at end of file
@@ -1,17 +1,19 @@
 import os
-from typing import List, Optional
-from pydantic import BaseSettings, validator
+from functools import lru_cache
+from typing import Optional, Tuple
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     # Environment
     environment: str = "development"
-    debug: bool = False
     
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_workers: int = 4
+    dev_reload: bool = False  # Auto-reload on code changes; disables worker pool
     
     # Database Configuration
     database_url: str
@@ -20,23 +22,26 @@ class Settings(BaseSettings):
     
     # Redis Configuration
     redis_url: str = "redis://localhost:6379"
+    redis_max_connections: int = 50
+    redis_pool_timeout: float = 5.0  # Seconds to wait for a free pooled connection
     
     # JWT Configuration
     jwt_secret: str
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 1440  # 24 hours
+    jwt_check_revocation: bool = True  # Consult the Redis deny-list on verify
     
     # CORS Configuration
-    cors_origins: List[str] = ["http://localhost:3000"]
-    allowed_hosts: List[str] = ["localhost", "127.0.0.1"]
+    cors_origins: Tuple[str, ...] = ("http://localhost:3000",)
+    allowed_hosts: Tuple[str, ...] = ("localhost", "127.0.0.1")
     
     # File Storage Configuration
     storage_path: str = "/app/storage"
     max_file_size: int = 1073741824  # 1GB
-    allowed_file_types: List[str] = [
+    allowed_file_types: Tuple[str, ...] = (
         "image/jpeg", "image/png", "image/tiff", 
         "application/zip", "text/plain"
-    ]
+    )
     
     # WebODM Configuration
     webodm_api_url: Optional[str] = None
@@ -56,41 +61,65 @@ class Settings(BaseSettings):
     # Logging Configuration
     log_level: str = "INFO"
     log_format: str = "json"
+    log_sample_rate: float = 1.0  # Fraction of successful requests logged
     
     # Monitoring Configuration
     enable_metrics: bool = True
     metrics_port: int = 9090
     
-    @validator("debug", pre=True)
-    def set_debug(cls, v, values):
-        return values.get("environment", "").lower() == "development"
+    @property
+    def debug(self) -> bool:
+        """Debug mode is implied by the development environment"""
+        return self.environment.lower() == "development"
     
-    @validator("cors_origins", pre=True)
+    @field_validator("cors_origins", mode="before")
+    @classmethod
     def parse_cors_origins(cls, v):
         if isinstance(v, str):
-            return [origin.strip() for origin in v.split(",")]
+            return tuple(origin.strip() for origin in v.split(","))
         return v
     
-    @validator("allowed_hosts", pre=True)
+    @field_validator("allowed_hosts", mode="before")
+    @classmethod
     def parse_allowed_hosts(cls, v):
         if isinstance(v, str):
-            return [host.strip() for host in v.split(",")]
+            return tuple(host.strip() for host in v.split(","))
         return v
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore")
 
 
 # Service-specific settings
 class AuthServiceSettings(Settings):
     service_name: str = "auth-service"
     service_port: int = 8001
+    
+    # Postgres connections the whole service may hold, split across its workers
+    database_connection_budget: int = 40
+    
+    # In-memory cache of verified tokens
+    token_cache_size: int = 10000
+    token_cache_ttl: int = 30  # seconds
+    
+    bcrypt_rounds: int = 12  # Cost of new password hashes; existing hashes keep theirs
+    
+    @property
+    def worker_pool_size(self) -> int:
+        """Persistent connections per worker, half of the worker's share of the budget"""
+        return max(1, self.database_connection_budget // (2 * self.api_workers))
+    
+    @property
+    def worker_max_overflow(self) -> int:
+        """Burst connections per worker on top of the pool, the other half of its share"""
+        return max(1, self.database_connection_budget // (2 * self.api_workers))
 
 
 class FileServiceSettings(Settings):
     service_name: str = "file-service"
     service_port: int = 8002
+    
+    file_cache_ttl: int = 300  # Seconds a file record stays in the Redis cache
+    reprocess_batch_limit: int = 1000  # Files loaded per batch during a bulk reprocess
 
 
 class WebODMServiceSettings(Settings):
@@ -130,11 +159,15 @@ class APIGatewaySettings(Settings):
     processing_service_url: str = "http://processing-service:8005"
     analysis_service_url: str = "http://analysis-service:8006"
     visualization_service_url: str = "http://visualization-service:8007"
+    
+    # Seconds to reuse the aggregated downstream health before re-probing
+    health_cache_ttl: float = 5.0
 
 
 # Factory function to get settings based on service
+@lru_cache(maxsize=None)
 def get_settings(service_name: str = None) -> Settings:
-    """Get settings instance based on service name"""
+    """Get settings instance based on service name (built once per service)"""
     settings_map = {
         "auth-service": AuthServiceSettings,
         "file-service": FileServiceSettings,
@@ -1,9 +1,12 @@
 from datetime import datetime
 from enum import Enum
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from uuid import UUID, uuid4
 
+# Bound once so response construction skips the attribute lookup
+_now = datetime.utcnow
+
 
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -32,7 +35,7 @@ class FileType(str, Enum):
 class BaseResponse(BaseModel):
     success: bool = True
     message: str = ""
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=_now)
 
 
 class PaginationParams(BaseModel):
@@ -73,8 +76,7 @@ class User(UserBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
 
 
 class UserLogin(BaseModel):
@@ -114,8 +116,7 @@ class Project(ProjectBase):
     updated_at: Optional[datetime] = None
     is_active: bool = True
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
 
 
 # File Models
@@ -151,8 +152,7 @@ class File(FileBase):
     created_at: datetime
     is_processed: bool = False
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
 
 
 # Processing Models
@@ -180,8 +180,7 @@ class ProcessingTask(ProcessingTaskBase):
     completed_at: Optional[datetime] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
 
 
 # WebODM Models
@@ -251,8 +250,7 @@ class Analysis(AnalysisBase):
     created_at: datetime
     completed_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
 
 
 # Visualization Models
@@ -277,8 +275,7 @@ class Layer(LayerBase):
     data_source: Dict[str, Any]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(extra="ignore", from_attributes=True)
 
 
 # API Response Models
@@ -1,30 +1,85 @@
+import asyncio
+import base64
+import calendar
+import functools
 import hashlib
+import hmac
 import logging
+import mmap
 import os
+import re
+import stat
+import string
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Union
+from typing import Any, Collection, Dict, Iterable, NamedTuple, Optional, Tuple, Union
 from pathlib import Path
 
+import bcrypt
 import jwt
-from passlib.context import CryptContext
+import orjson
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only used to vectorize large coordinate reductions
+    np = None
 
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+DEFAULT_BCRYPT_ROUNDS = 12
 
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: int = DEFAULT_BCRYPT_ROUNDS) -> str:
     """Hash a password using bcrypt"""
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    except ValueError:
+        # Malformed or non-bcrypt hash
+        return False
+
+
+async def hash_password_async(password: str, rounds: int = DEFAULT_BCRYPT_ROUNDS) -> str:
+    """Hash a password in a worker thread, keeping bcrypt off the event loop"""
+    return await asyncio.to_thread(hash_password, password, rounds)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in a worker thread, keeping bcrypt off the event loop"""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
 
 
 # JWT utilities
+DEFAULT_TOKEN_EXPIRE_SECONDS = 15 * 60
+
+# HMAC algorithms signed in a single OpenSSL call instead of through PyJWS
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _b64url_encode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+
+@functools.lru_cache(maxsize=8)
+def _jwt_signer(secret_key: str, algorithm: str) -> Tuple[jwt.PyJWS, Any]:
+    """PyJWS bound to one algorithm, plus the key already prepared for it"""
+    jws = jwt.PyJWS(algorithms=[algorithm])
+    return jws, jws.get_algorithm_by_name(algorithm).prepare_key(secret_key)
+
+
+@functools.lru_cache(maxsize=8)
+def _jwt_header_segment(algorithm: str) -> bytes:
+    """Encoded JWS header, identical for every token of an algorithm"""
+    return _b64url_encode(orjson.dumps({"alg": algorithm, "typ": "JWT"}))
+
+
 def create_access_token(
     data: Dict[str, Any], 
     secret_key: str, 
@@ -32,15 +87,27 @@ def create_access_token(
     expires_delta: Optional[timedelta] = None
 ) -> str:
     """Create a JWT access token"""
-    to_encode = data.copy()
-    
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = int(time.time()) + int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+        expire = int(time.time()) + DEFAULT_TOKEN_EXPIRE_SECONDS
+    
+    claims = {**data, "exp": expire}
+    # NumericDate claims, converted from datetimes the way jwt.encode does
+    for claim in ("iat", "nbf"):
+        value = claims.get(claim)
+        if isinstance(value, datetime):
+            claims[claim] = calendar.timegm(value.utctimetuple())
+    
+    jws, key = _jwt_signer(secret_key, algorithm)
+    payload = orjson.dumps(claims)
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=algorithm)
+    if algorithm not in _HMAC_DIGESTS:
+        return jws.encode(payload, key, algorithm=algorithm)
+    
+    signing_input = _jwt_header_segment(algorithm) + b"." + _b64url_encode(payload)
+    signature = hmac.digest(key, signing_input, _HMAC_DIGESTS[algorithm])
+    encoded_jwt = (signing_input + b"." + _b64url_encode(signature)).decode()
     return encoded_jwt
 
 
@@ -58,40 +125,150 @@ def verify_token(
 
 
 # File utilities
+MMAP_HASH_THRESHOLD = 16 << 20  # Files at least this large are hashed via mmap
+HASH_CHUNK_SIZE = 1 << 20  # Read size for files hashed through a buffer
+
+
+def _sha256_factory():
+    """SHA-256 constructor for integrity checksums, flagged as not used for security"""
+    try:
+        hashlib.sha256(usedforsecurity=False)
+    except TypeError:
+        return hashlib.sha256
+    return functools.partial(hashlib.sha256, usedforsecurity=False)
+
+
+new_file_hasher = _sha256_factory()
+
+_hash_local = threading.local()
+
+
+def _hash_scratch() -> Tuple[bytearray, memoryview]:
+    """Per-thread read buffer reused by every file hashed on that thread"""
+    scratch = getattr(_hash_local, "scratch", None)
+    if scratch is None:
+        buf = bytearray(HASH_CHUNK_SIZE)
+        scratch = _hash_local.scratch = (buf, memoryview(buf))
+    return scratch
+
+
 def generate_file_hash(file_path: Union[str, Path]) -> str:
     """Generate SHA-256 hash of a file"""
-    hash_sha256 = hashlib.sha256()
+    hash_sha256 = new_file_hasher()
     
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_sha256.update(chunk)
+    # Unbuffered: readinto fills the scratch buffer directly, no BufferedReader copy
+    with open(file_path, "rb", buffering=0) as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_HASH_THRESHOLD:
+            # Hash straight from the page cache, without copying into read buffers
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                hash_sha256.update(mm)
+        else:
+            buf, view = _hash_scratch()
+            while n := f.readinto(buf):
+                hash_sha256.update(view[:n])
     
     return hash_sha256.hexdigest()
 
 
+def generate_file_hashes(
+    file_paths: Iterable[Union[str, Path]], 
+    max_workers: int = 16
+) -> Dict[str, str]:
+    """Generate SHA-256 hashes of many files in parallel, keyed by path"""
+    paths = [str(path) for path in file_paths]
+    if len(paths) <= 1:
+        return {path: generate_file_hash(path) for path in paths}
+    
+    # hashlib releases the GIL while hashing, so threads scale across cores
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+        return dict(zip(paths, pool.map(generate_file_hash, paths)))
+
+
 def generate_unique_filename(original_filename: str) -> str:
     """Generate a unique filename while preserving the extension"""
-    file_path = Path(original_filename)
-    unique_id = str(uuid.uuid4())
-    return f"{unique_id}{file_path.suffix}"
+    # UUID4 built straight from random bytes, skipping uuid.UUID construction
+    raw = bytearray(os.urandom(16))
+    raw[6] = (raw[6] & 0x0F) | 0x40  # version 4
+    raw[8] = (raw[8] & 0x3F) | 0x80  # RFC 4122 variant
+    h = raw.hex()
+    
+    suffix = os.path.splitext(original_filename)[1]
+    if suffix == ".":
+        suffix = ""  # Match Path.suffix, which ignores a bare trailing dot
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}{suffix}"
 
 
 def ensure_directory_exists(directory: Union[str, Path]) -> None:
     """Ensure a directory exists, create if it doesn't"""
+    # One stat in the common case, instead of mkdir walking the parents
+    if os.path.isdir(directory):
+        return
     Path(directory).mkdir(parents=True, exist_ok=True)
 
 
+class FileMeta(NamedTuple):
+    """Size, modification time and type of a path from a single stat"""
+    size: int
+    mtime: float
+    is_file: bool
+
+
+def file_meta(file_path: Union[str, Path]) -> FileMeta:
+    """Get size, mtime and whether the path is a regular file with one syscall"""
+    st = os.stat(file_path)
+    return FileMeta(st.st_size, st.st_mtime, stat.S_ISREG(st.st_mode))
+
+
 def get_file_size(file_path: Union[str, Path]) -> int:
-    """Get file size in bytes"""
-    return os.path.getsize(file_path)
+    """Get file size in bytes (use file_meta when more than the size is needed)"""
+    return os.stat(file_path).st_size
 
 
-def is_valid_file_type(mime_type: str, allowed_types: list) -> bool:
-    """Check if file type is allowed"""
+IMAGE_MIME_TYPES = frozenset(("image/jpeg", "image/png", "image/tiff"))
+
+
+def is_valid_file_type(mime_type: str, allowed_types: Collection[str]) -> bool:
+    """Check if file type is allowed; pass a frozenset built once for O(1) lookups"""
     return mime_type in allowed_types
 
 
 # Logging utilities
+class _JSONFormatter(logging.Formatter):
+    """Formats each record as a single JSON object tagged with the service name"""
+    
+    def __init__(self, service_name: str):
+        super().__init__()
+        self.service_name = service_name
+        self._second = (-1, "")  # (epoch second, formatted prefix) of the last record
+    
+    def _timestamp(self, created: float) -> str:
+        """ISO timestamp of a record, formatting the date/time part once per second"""
+        second = int(created)
+        cached_second, prefix = self._second
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1_000_000):06d}"
+    
+    def format(self, record):
+        log_entry = {
+            "timestamp": self._timestamp(record.created),
+            "service": self.service_name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno
+        }
+        
+        if record.exc_info:
+            log_entry["exception"] = self.formatException(record.exc_info)
+        
+        return orjson.dumps(log_entry).decode()
+
+
 def setup_logging(
     service_name: str,
     log_level: str = "INFO",
@@ -109,26 +286,7 @@ def setup_logging(
     handler = logging.StreamHandler()
     
     if log_format.lower() == "json":
-        import json
-        
-        class JSONFormatter(logging.Formatter):
-            def format(self, record):
-                log_entry = {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "service": service_name,
-                    "level": record.levelname,
-                    "message": record.getMessage(),
-                    "module": record.module,
-                    "function": record.funcName,
-                    "line": record.lineno
-                }
-                
-                if record.exc_info:
-                    log_entry["exception"] = self.formatException(record.exc_info)
-                
-                return json.dumps(log_entry)
-        
-        formatter = JSONFormatter()
+        formatter = _JSONFormatter(service_name)
     else:
         formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -141,8 +299,24 @@ def setup_logging(
 
 
 # Validation utilities
+_UUID_RE = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+_EMAIL_LOCAL_CHARS = frozenset(string.ascii_letters + string.digits + "._%+-")
+_EMAIL_DOMAIN_CHARS = frozenset(string.ascii_letters + string.digits + ".-")
+_EMAIL_TLD_CHARS = frozenset(string.ascii_letters)
+
+
 def validate_uuid(uuid_string: str) -> bool:
     """Validate if string is a valid UUID"""
+    # Canonical form matches without building a UUID object
+    if _UUID_RE.fullmatch(uuid_string):
+        return True
+    
+    # Too short to hold 32 hex digits, reject without raising
+    if len(uuid_string) < 32:
+        return False
+    
+    # Other forms uuid.UUID accepts (braces, urn prefix, no dashes)
     try:
         uuid.UUID(uuid_string)
         return True
@@ -151,31 +325,48 @@ def validate_uuid(uuid_string: str) -> bool:
 
 
 def validate_email(email: str) -> bool:
-    """Basic email validation"""
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    """Basic email validation, a single linear scan with no backtracking"""
+    local, at, domain = email.rpartition("@")
+    if not at or not local or not _EMAIL_LOCAL_CHARS.issuperset(local):
+        return False
+    
+    if not _EMAIL_DOMAIN_CHARS.issuperset(domain):
+        return False
+    
+    host, dot, tld = domain.rpartition(".")
+    return bool(dot and host) and len(tld) >= 2 and _EMAIL_TLD_CHARS.issuperset(tld)
 
 
 # Pagination utilities
+class Pagination(NamedTuple):
+    """Pagination metadata for one page of results"""
+    page: int
+    size: int
+    total: int
+    pages: int
+    has_next: bool
+    has_prev: bool
+
+
+def paginate(page: int, size: int, total: int) -> Pagination:
+    """Calculate pagination metadata without a per-call dict"""
+    pages = -(-total // size)  # Ceiling division
+    return Pagination(page, size, total, pages, page < pages, page > 1)
+
+
 def calculate_pagination(page: int, size: int, total: int) -> Dict[str, int]:
-    """Calculate pagination metadata"""
-    pages = (total + size - 1) // size  # Ceiling division
-    
-    return {
-        "page": page,
-        "size": size,
-        "total": total,
-        "pages": pages,
-        "has_next": page < pages,
-        "has_prev": page > 1
-    }
+    """Calculate pagination metadata as a dict"""
+    return paginate(page, size, total)._asdict()
 
 
 # Coordinate utilities
 def validate_coordinates(lat: float, lon: float) -> bool:
-    """Validate latitude and longitude coordinates"""
-    return -90 <= lat <= 90 and -180 <= lon <= 180
+    """Validate latitude and longitude coordinates (elementwise for NumPy arrays)"""
+    # Bitwise & evaluates all four bounds without short-circuit branches
+    return (-90.0 <= lat) & (lat <= 90.0) & (-180.0 <= lon) & (lon <= 180.0)
+
+
+NUMPY_BBOX_THRESHOLD = 64  # Below this, NumPy conversion costs more than it saves
 
 
 def calculate_bounding_box(coordinates: list) -> Dict[str, float]:
@@ -183,14 +374,46 @@ def calculate_bounding_box(coordinates: list) -> Dict[str, float]:
     if not coordinates:
         return {}
     
-    lats = [coord[1] for coord in coordinates]
-    lons = [coord[0] for coord in coordinates]
+    if np is not None and len(coordinates) >= NUMPY_BBOX_THRESHOLD:
+        try:
+            points = np.asarray(coordinates, dtype=np.float64)[:, :2]  # (lon, lat) rows
+        except ValueError:
+            # Mixed (lon, lat) and (lon, lat, alt) points; use the single pass below
+            points = None
+        if points is not None:
+            mins = points.min(axis=0)
+            maxs = points.max(axis=0)
+            return {
+                "min_lat": float(mins[1]),
+                "max_lat": float(maxs[1]),
+                "min_lon": float(mins[0]),
+                "max_lon": float(maxs[0])
+            }
+    
+    # Single pass tracking all four extremes, no intermediate lists
+    points = iter(coordinates)
+    first = next(points)
+    min_lon = max_lon = first[0]
+    min_lat = max_lat = first[1]
     
+    for coord in points:
+        lon = coord[0]
+        lat = coord[1]
+        if lon < min_lon:
+            min_lon = lon
+        elif lon > max_lon:
+            max_lon = lon
+        if lat < min_lat:
+            min_lat = lat
+        elif lat > max_lat:
+            max_lat = lat
+    
+    # Floats on both paths, so the result doesn't depend on input size or type
     return {
-        "min_lat": min(lats),
-        "max_lat": max(lats),
-        "min_lon": min(lons),
-        "max_lon": max(lons)
+        "min_lat": float(min_lat),
+        "max_lat": float(max_lat),
+        "min_lon": float(min_lon),
+        "max_lon": float(max_lon)
     }
 
 
@@ -228,12 +451,27 @@ class NotFoundError(ServiceError):
 
 
 # Health check utilities
+@functools.lru_cache(maxsize=4)
+def _health_engine(database_url: str):
+    """Engine reused across database health checks, holding one pooled connection"""
+    from sqlalchemy import create_engine
+    return create_engine(
+        database_url, pool_size=1, max_overflow=2, pool_recycle=1800, pool_pre_ping=True
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _health_redis(redis_url: str):
+    """Redis client reused across health checks, with its own small pool"""
+    import redis
+    return redis.from_url(redis_url, max_connections=2)
+
+
 def check_database_health(database_url: str) -> bool:
     """Check if database is healthy"""
     try:
-        from sqlalchemy import create_engine, text
-        engine = create_engine(database_url)
-        with engine.connect() as conn:
+        from sqlalchemy import text
+        with _health_engine(database_url).connect() as conn:
             conn.execute(text("SELECT 1"))
         return True
     except Exception:
@@ -243,9 +481,7 @@ def check_database_health(database_url: str) -> bool:
 def check_redis_health(redis_url: str) -> bool:
     """Check if Redis is healthy"""
     try:
-        import redis
-        r = redis.from_url(redis_url)
-        r.ping()
+        _health_redis(redis_url).ping()
         return True
     except Exception:
         return False
@@ -259,15 +495,16 @@ async def async_retry(
     backoff: float = 2.0
 ):
     """Retry an async function with exponential backoff"""
-    import asyncio
-    
     for attempt in range(max_retries):
         try:
             return await func()
-        except Exception as e:
+        except Exception:
             if attempt == max_retries - 1:
-                raise e
+                raise
             
-            await asyncio.sleep(delay * (backoff ** attempt))
+            if backoff == 2.0:
+                await asyncio.sleep(delay * (1 << attempt))
+            else:
+                await asyncio.sleep(delay * (backoff ** attempt))
     
     return None
\ No newline at end of file